@@ -1,9 +1,10 @@
 import json
 import sys
+from registry_snapshot import leer_esquema
 
 def load_schema(file_path):
-    with open(file_path) as f:
-        return json.load(f)
+    # file_path can also reference a registry snapshot: <snapshot.db>#<subject>/<version>
+    return json.loads(leer_esquema(file_path))
 
 def field_dict(schema):
     return {f["name"]: f for f in schema.get("fields", [])}
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import requests
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from avro.schema import parse
+
+# Estructura del snapshot: esquemas deduplicados por el hash de su JSON completo (doc, defaults y
+# aliases incluidos), versiones indexadas por subject/versión, id y huella de la forma canónica
+# (para buscar esquemas equivalentes), y la configuración de compatibilidad
+ESTRUCTURA = """
+CREATE TABLE esquemas (
+    hash TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    canonico TEXT NOT NULL,
+    esquema TEXT NOT NULL,
+    tipo TEXT NOT NULL
+);
+CREATE TABLE versiones (
+    subject TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    hash TEXT NOT NULL REFERENCES esquemas(hash),
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (subject, version)
+) WITHOUT ROWID;
+CREATE INDEX versiones_id ON versiones(id);
+CREATE INDEX versiones_fingerprint ON versiones(fingerprint);
+CREATE TABLE config (
+    subject TEXT PRIMARY KEY,
+    compatibilidad TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE metadatos (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Subject con el que se guarda la configuración global del registry
+CONFIG_GLOBAL = ''
+
+# Separador de las referencias a esquemas del snapshot: <snapshot.db>#<subject>/<version>
+SEPARADOR_REFERENCIA = '#'
+
+def sha256(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def normalizar_esquema(texto, tipo='AVRO'):
+    """
+    Devuelve (hash, fingerprint, canonico, esquema) para un esquema del registry.
+    El hash identifica el esquema completo compactado; la forma canónica descarta defaults, aliases y doc,
+    que la validación necesita, así que su huella (fingerprint) solo sirve para buscar esquemas equivalentes.
+    """
+    if tipo == 'AVRO':
+        contenido = json.loads(texto)
+        canonico = parse(texto).canonical_form
+        esquema = json.dumps(contenido, separators=(',', ':'), ensure_ascii=False)
+        clave = json.dumps(contenido, separators=(',', ':'), ensure_ascii=False, sort_keys=True)
+    else:
+        canonico = esquema = clave = texto
+
+    return sha256(clave), sha256(canonico), canonico, esquema
+
+def listar_versiones(sesion, url_registry, subject):
+    response = sesion.get(f"{url_registry}/subjects/{subject}/versions")
+    response.raise_for_status()
+    return response.json()
+
+def descargar_version(sesion, url_registry, subject, version):
+    response = sesion.get(f"{url_registry}/subjects/{subject}/versions/{version}")
+    response.raise_for_status()
+    return response.json()
+
+def descargar_compatibilidad(sesion, url_registry, subject=None):
+    url = f"{url_registry}/config/{subject}" if subject else f"{url_registry}/config"
+    response = sesion.get(url)
+    if response.status_code != 200:
+        return None
+    return response.json()['compatibilityLevel'].upper()
+
+def exportar(url_registry, archivo, hilos=8):
+    """
+    Exporta todos los subjects, versiones, ids y configuración del registry a un snapshot SQLite.
+    Las peticiones se reparten entre varios hilos sobre una única sesión HTTP.
+    """
+    sesion = requests.Session()
+
+    response = sesion.get(f"{url_registry}/subjects")
+    response.raise_for_status()
+    subjects = response.json()
+
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        listados = executor.map(lambda s: listar_versiones(sesion, url_registry, s), subjects)
+        pares = [(s, v) for s, versiones in zip(subjects, listados) for v in versiones]
+
+        versiones = list(executor.map(lambda par: descargar_version(sesion, url_registry, *par), pares))
+        configs = dict(zip(subjects, executor.map(lambda s: descargar_compatibilidad(sesion, url_registry, s), subjects)))
+
+    configs[CONFIG_GLOBAL] = descargar_compatibilidad(sesion, url_registry)
+
+    # Se escribe en un archivo temporal y se renombra al final para no dejar snapshots a medias
+    temporal = f"{archivo}.tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    conn = sqlite3.connect(temporal)
+    completado = False
+    try:
+        conn.executescript(ESTRUCTURA)
+
+        for v in versiones:
+            tipo = v.get('schemaType', 'AVRO')
+            hash_esquema, fingerprint, canonico, esquema = normalizar_esquema(v['schema'], tipo)
+            conn.execute("INSERT OR IGNORE INTO esquemas VALUES (?, ?, ?, ?, ?)",
+                         (hash_esquema, fingerprint, canonico, esquema, tipo))
+            conn.execute("INSERT INTO versiones VALUES (?, ?, ?, ?, ?)",
+                         (v['subject'], v['version'], v['id'], hash_esquema, fingerprint))
+
+        conn.executemany("INSERT INTO config VALUES (?, ?)",
+                         [(s, c) for s, c in configs.items() if c is not None])
+        conn.executemany("INSERT INTO metadatos VALUES (?, ?)", [
+            ('registry', url_registry),
+            ('fecha', datetime.now().isoformat(timespec='seconds')),
+        ])
+        conn.commit()
+        conn.execute("VACUUM")
+        completado = True
+    finally:
+        conn.close()
+        if not completado:
+            os.remove(temporal)
+
+    os.replace(temporal, archivo)
+
+    return len(subjects), len(versiones)
+
+def abrir(archivo):
+    if not os.path.exists(archivo):
+        raise FileNotFoundError(f"El snapshot '{archivo}' no existe.")
+    return sqlite3.connect(f"file:{archivo}?mode=ro", uri=True)
+
+def obtener_esquema(conn, subject, version='latest'):
+    if version == 'latest':
+        fila = conn.execute(
+            "SELECT e.esquema FROM versiones v JOIN esquemas e USING (hash) "
+            "WHERE v.subject = ? ORDER BY v.version DESC LIMIT 1", (subject,)).fetchone()
+    else:
+        fila = conn.execute(
+            "SELECT e.esquema FROM versiones v JOIN esquemas e USING (hash) "
+            "WHERE v.subject = ? AND v.version = ?", (subject, int(version))).fetchone()
+
+    if fila is None:
+        raise KeyError(f"No existe la versión '{version}' del subject '{subject}' en el snapshot")
+    return fila[0]
+
+def obtener_esquema_por_id(conn, id_esquema):
+    fila = conn.execute(
+        "SELECT e.esquema FROM versiones v JOIN esquemas e USING (hash) WHERE v.id = ? LIMIT 1",
+        (id_esquema,)).fetchone()
+    if fila is None:
+        raise KeyError(f"No existe el esquema con id {id_esquema} en el snapshot")
+    return fila[0]
+
+def buscar_versiones(conn, texto, tipo='AVRO'):
+    """Devuelve las (subject, version, id) registradas con la misma forma canónica que el esquema dado."""
+    _, fingerprint, _, _ = normalizar_esquema(texto, tipo)
+    return conn.execute(
+        "SELECT subject, version, id FROM versiones WHERE fingerprint = ? ORDER BY subject, version",
+        (fingerprint,)).fetchall()
+
+def obtener_compatibilidad_snapshot(conn, subject):
+    # Igual que el registry: config del subject, si no la global y, por defecto, BACKWARD
+    for clave in (subject, CONFIG_GLOBAL):
+        fila = conn.execute("SELECT compatibilidad FROM config WHERE subject = ?", (clave,)).fetchone()
+        if fila is not None:
+            return fila[0]
+    return 'BACKWARD'
+
+def leer_esquema(referencia):
+    """
+    Devuelve el texto de un esquema a partir de una ruta a un .avsc o de una referencia
+    al snapshot con la forma <snapshot.db>#<subject>/<version> (version puede ser 'latest').
+    """
+    if SEPARADOR_REFERENCIA not in referencia or os.path.exists(referencia):
+        with open(referencia) as f:
+            return f.read()
+
+    archivo, clave = referencia.split(SEPARADOR_REFERENCIA, 1)
+    subject, _, version = clave.partition('/')
+
+    conn = abrir(archivo)
+    try:
+        return obtener_esquema(conn, subject, version or 'latest')
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    comandos = {
+        'exportar': "python registry_snapshot.py exportar <url_registry> <snapshot.db>",
+        'mostrar': "python registry_snapshot.py mostrar <snapshot.db> <subject> [version]",
+        'id': "python registry_snapshot.py id <snapshot.db> <id>",
+        'buscar': "python registry_snapshot.py buscar <snapshot.db> <esquema.avsc>",
+    }
+
+    if len(sys.argv) < 2 or sys.argv[1] not in comandos:
+        print("Uso:")
+        for uso in comandos.values():
+            print(f"  {uso}")
+        sys.exit(1)
+
+    try:
+        if sys.argv[1] == 'exportar':
+            if len(sys.argv) != 4:
+                print(f"Uso: {comandos['exportar']}")
+                sys.exit(1)
+
+            total_subjects, total_versiones = exportar(sys.argv[2], sys.argv[3])
+            print(f"✅ Snapshot '{sys.argv[3]}' creado: {total_subjects} subjects, {total_versiones} versiones")
+
+        elif sys.argv[1] == 'mostrar':
+            if len(sys.argv) not in (4, 5):
+                print(f"Uso: {comandos['mostrar']}")
+                sys.exit(1)
+
+            conn = abrir(sys.argv[2])
+            try:
+                print(obtener_esquema(conn, sys.argv[3], sys.argv[4] if len(sys.argv) == 5 else 'latest'))
+            finally:
+                conn.close()
+
+        elif sys.argv[1] == 'id':
+            if len(sys.argv) != 4:
+                print(f"Uso: {comandos['id']}")
+                sys.exit(1)
+
+            conn = abrir(sys.argv[2])
+            try:
+                print(obtener_esquema_por_id(conn, int(sys.argv[3])))
+            finally:
+                conn.close()
+
+        else:
+            if len(sys.argv) != 4:
+                print(f"Uso: {comandos['buscar']}")
+                sys.exit(1)
+
+            with open(sys.argv[3]) as f:
+                texto = f.read()
+
+            conn = abrir(sys.argv[2])
+            try:
+                encontradas = buscar_versiones(conn, texto)
+            finally:
+                conn.close()
+
+            if not encontradas:
+                print("🔍 Ninguna versión registrada equivale a este esquema")
+            for subject, version, id_esquema in encontradas:
+                print(f"  - {subject} v{version} (id {id_esquema})")
+
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
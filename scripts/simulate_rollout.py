@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+import sys
+import argparse
+import math
+import itertools
+from avro.schema import parse
+from registry_snapshot import leer_esquema
+from validate_compatibility import analizar_lector, cargar_esquema_lector
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("❌ simulate_rollout.py necesita numpy: pip install -r scripts/requirements.txt")
+
+# Flota por defecto: la de este escenario (producer, consumer1 y consumer2 con una réplica cada uno)
+PRODUCTORES_POR_DEFECTO = 1
+CONSUMIDORES_POR_DEFECTO = ['consumer1=1', 'consumer2=1']
+
+# Código de grupo de las réplicas del productor; los consumidores usan 1..N en el orden de la flota
+PRODUCTOR = 0
+
+# Nombres de las estrategias que no son un orden por grupos
+SIMULTANEO = 'simultáneo (todas las réplicas a la vez)'
+ALEATORIO = 'aleatorio (réplicas intercaladas, sin coordinar)'
+
+# Órdenes por grupos evaluados como máximo (todas las permutaciones hasta 5 grupos; por encima, una muestra)
+MAX_ORDENES = 120
+
+# Dos estrategias se consideran equivalentes si sus diferencias no superan este número de errores estándar
+Z_EQUIVALENCIA = 2.0
+
+def compatibilidad_paso(anterior, nueva, lectores_anteriores):
+    """
+    Para el paso anterior -> nueva devuelve, por grupo (índice = código de grupo):
+    - lee_nuevo[g]: el consumidor g, aún con su esquema lector anterior, puede leer lo que escribe un productor en la nueva
+    - nuevo_lee_antiguo[g]: el consumidor g, ya en la nueva versión, puede leer lo que escribe un productor en la anterior
+    lectores_anteriores[g] es el esquema lector desplegado de cada consumidor (None para el productor).
+    """
+    nuevo_lee_antiguo = analizar_lector(anterior, nueva)['compatible']
+    lee_nuevo = [True] + [analizar_lector(nueva, lector)['compatible'] for lector in lectores_anteriores[1:]]
+    return np.array(lee_nuevo), np.array([True] + [nuevo_lee_antiguo] * (len(lectores_anteriores) - 1))
+
+def duraciones_aleatorias(rng, media, sigma, forma):
+    # Lognormal con la media indicada: mu = log(media) - sigma^2 / 2
+    return rng.lognormal(np.log(media) - sigma ** 2 / 2, sigma, forma)
+
+def ventanas_de_riesgo(grupos, fin, lee_nuevo, nuevo_lee_antiguo, lag):
+    """
+    Calcula, para cada simulación, cuánto tiempo hay algún consumidor que no puede leer lo producido.
+    grupos y fin son (N, R): el código de grupo de cada réplica y el instante en que termina de actualizarse.
+    Dentro de un paso solo conviven dos versiones del productor, así que hay dos ventanas posibles:
+    - [primer productor nuevo, último consumidor antiguo que no puede leer la nueva)
+    - [primer consumidor nuevo que no puede leer la anterior, último productor antiguo + lag)
+      (los mensajes antiguos siguen en el topic hasta que se consumen)
+    Las réplicas sin problema no abren ventana; si ninguna lo tiene, los extremos quedan en ±inf y la ventana es 0.
+    """
+    es_productor = grupos == PRODUCTOR
+    falla_nuevo = ~lee_nuevo[grupos]
+    falla_antiguo = ~nuevo_lee_antiguo[grupos]
+
+    inicio_1 = np.min(np.where(es_productor, fin, np.inf), axis=-1)
+    fin_1 = np.max(np.where(falla_nuevo, fin, -np.inf), axis=-1)
+    inicio_2 = np.min(np.where(falla_antiguo, fin, np.inf), axis=-1)
+    fin_2 = np.max(np.where(es_productor, fin, -np.inf), axis=-1) + lag
+
+    duracion_1 = np.clip(fin_1 - inicio_1, 0, None)
+    duracion_2 = np.clip(fin_2 - inicio_2, 0, None)
+    solape = np.clip(np.minimum(fin_1, fin_2) - np.maximum(inicio_1, inicio_2), 0, None)
+    return duracion_1 + duracion_2 - solape
+
+def simular_ordenes(grupos, lee_nuevo, nuevo_lee_antiguo, rng, media, sigma, lag):
+    """
+    Despliegue escalonado (una réplica detrás de otra) siguiendo el orden de cada fila de grupos.
+    Devuelve (ventana de riesgo, duración del despliegue) por simulación.
+    """
+    fin = np.cumsum(duraciones_aleatorias(rng, media, sigma, grupos.shape), axis=-1)
+    return ventanas_de_riesgo(grupos, fin, lee_nuevo, nuevo_lee_antiguo, lag), fin[:, -1]
+
+def simular_simultaneo(flota, simulaciones, lee_nuevo, nuevo_lee_antiguo, rng, media, sigma, jitter, lag):
+    # Todas las réplicas arrancan a la vez, con un desfase aleatorio de hasta 'jitter' segundos
+    forma = (simulaciones, len(flota))
+    fin = rng.uniform(0, jitter, forma) + duraciones_aleatorias(rng, media, sigma, forma)
+    grupos = np.broadcast_to(flota, forma)
+    return ventanas_de_riesgo(grupos, fin, lee_nuevo, nuevo_lee_antiguo, lag), fin.max(axis=-1)
+
+def describir_orden(patron, nombres):
+    # Agrupa réplicas consecutivas del mismo grupo: "consumer1 ×2 → productor ×1"
+    bloques = []
+    for grupo in patron:
+        if bloques and bloques[-1][0] == grupo:
+            bloques[-1][1] += 1
+        else:
+            bloques.append([grupo, 1])
+    return ' → '.join(f"{nombres[grupo]} ×{n}" for grupo, n in bloques)
+
+def ordenes_por_grupos(flota, rng):
+    """
+    Devuelve los órdenes en los que cada grupo se despliega entero antes de pasar al siguiente
+    (las réplicas de un grupo son intercambiables, así que basta con ordenar los grupos).
+    """
+    grupos = list(dict.fromkeys(flota.tolist()))
+    if math.factorial(len(grupos)) <= MAX_ORDENES:
+        permutaciones = itertools.permutations(grupos)
+    else:
+        permutaciones = dict.fromkeys(tuple(rng.permutation(grupos)) for _ in range(MAX_ORDENES))
+
+    replicas = {g: flota[flota == g] for g in grupos}
+    return [np.concatenate([replicas[g] for g in orden]) for orden in permutaciones]
+
+def resumir(nombre, ventana, total):
+    en_riesgo = ventana > 0
+    muestras = len(ventana)
+    probabilidad = en_riesgo.mean()
+    return {
+        'orden': nombre,
+        'muestras': muestras,
+        'probabilidad': probabilidad,
+        'error_probabilidad': np.sqrt(probabilidad * (1 - probabilidad) / muestras),
+        'ventana_media': ventana[en_riesgo].mean() if en_riesgo.any() else 0.0,
+        'error_ventana': ventana[en_riesgo].std() / np.sqrt(en_riesgo.sum()) if en_riesgo.any() else 0.0,
+        'ventana_p95': np.percentile(ventana, 95),
+        'despliegue_medio': total.mean(),
+    }
+
+def equivalentes(a, b):
+    # Diferencias dentro del ruido de la simulación en probabilidad y en ventana media
+    return all(abs(a[m] - b[m]) <= Z_EQUIVALENCIA * np.hypot(a[f'error_{e}'], b[f'error_{e}'])
+               for m, e in (('probabilidad', 'probabilidad'), ('ventana_media', 'ventana')))
+
+def simular_paso(anterior, nueva, lectores_anteriores, flota, nombres, rng,
+                 simulaciones, media, sigma, jitter, lag):
+    """
+    Evalúa las estrategias de despliegue del paso anterior -> nueva con 'simulaciones' muestras cada una:
+    cada orden por grupos (incluye "consumidores primero" y "productores primero"), un orden aleatorio
+    sin coordinar y el despliegue simultáneo. Devuelve las estrategias de menor a mayor riesgo y las
+    equivalentes a la mejor dentro del ruido de la simulación.
+    """
+    lee_nuevo, nuevo_lee_antiguo = compatibilidad_paso(anterior, nueva, lectores_anteriores)
+
+    resultados = []
+    for orden in ordenes_por_grupos(flota, rng):
+        ordenes = np.tile(orden, (simulaciones, 1))
+        ventana, total = simular_ordenes(ordenes, lee_nuevo, nuevo_lee_antiguo, rng, media, sigma, lag)
+        resultados.append(resumir(describir_orden(orden, nombres), ventana, total))
+
+    # Permutaciones aleatorias de la flota: réplicas de distintos grupos intercaladas
+    aleatorios = flota[np.argsort(rng.random((simulaciones, len(flota))), axis=1)]
+    ventana, total = simular_ordenes(aleatorios, lee_nuevo, nuevo_lee_antiguo, rng, media, sigma, lag)
+    resultados.append(resumir(ALEATORIO, ventana, total))
+
+    ventana, total = simular_simultaneo(flota, simulaciones, lee_nuevo, nuevo_lee_antiguo,
+                                        rng, media, sigma, jitter, lag)
+    resultados.append(resumir(SIMULTANEO, ventana, total))
+
+    # La duración del despliegue no desempata: con la misma flota solo difiere por ruido
+    resultados.sort(key=lambda r: (r['probabilidad'], r['ventana_media']))
+    recomendados = [r for r in resultados if equivalentes(r, resultados[0])]
+    return {'lee_nuevo': lee_nuevo, 'nuevo_lee_antiguo': nuevo_lee_antiguo,
+            'resultados': resultados, 'recomendados': recomendados}
+
+def simular(versiones, productores, consumidores, simulaciones=10000, media=60.0, sigma=0.5,
+            jitter=10.0, lag=5.0, semilla=None):
+    """
+    Simula el despliegue de una secuencia de versiones sobre una flota. consumidores es
+    {nombre: (réplicas, esquema lector desplegado o None)}; sin esquema lector se asume la primera versión.
+    Cada paso v_k -> v_k+1 se despliega por completo antes del siguiente, así que se simula y se
+    recomienda un orden por paso. Tras el primer paso todos los consumidores leen con v_k.
+    """
+    rng = np.random.default_rng(semilla)
+
+    nombres = ['productor'] + list(consumidores)
+    flota = np.array([PRODUCTOR] * productores +
+                     [g for g, (replicas, _) in enumerate(consumidores.values(), start=1) for _ in range(replicas)])
+
+    pasos = []
+    lectores = [None] + [lector or versiones[0] for _, lector in consumidores.values()]
+    for anterior, nueva in zip(versiones, versiones[1:]):
+        pasos.append(simular_paso(anterior, nueva, lectores, flota, nombres, rng,
+                                  simulaciones, media, sigma, jitter, lag))
+        lectores = [None] + [nueva] * len(consumidores)
+
+    return {'nombres': nombres, 'pasos': pasos}
+
+def imprimir_simulacion(simulacion, nombres_versiones):
+    nombres = simulacion['nombres']
+    for paso, anterior, nueva in zip(simulacion['pasos'], nombres_versiones, nombres_versiones[1:]):
+        print(f"🔍 Paso {anterior} → {nueva}:")
+        for grupo, nombre in enumerate(nombres[1:], start=1):
+            print(f"  {nombre}: "
+                  f"versión desplegada lee productor nuevo {'✅' if paso['lee_nuevo'][grupo] else '❌'}, "
+                  f"versión nueva lee productor antiguo {'✅' if paso['nuevo_lee_antiguo'][grupo] else '❌'}")
+
+        print("📋 Riesgo por orden de despliegue:")
+        for r in paso['resultados']:
+            empate = len(paso['recomendados']) > 1 and r in paso['recomendados']
+            print(f"  - {r['orden']}{' (≈ mejor)' if empate else ''}")
+            print(f"      P(ventana de incompatibilidad): {r['probabilidad']:.1%} | "
+                  f"ventana media: {r['ventana_media']:.1f}s | p95: {r['ventana_p95']:.1f}s | "
+                  f"despliegue medio: {r['despliegue_medio']:.1f}s | muestras: {r['muestras']}")
+
+        mejor = paso['resultados'][0]
+        if len(paso['recomendados']) == 1:
+            print(f"💡 Orden recomendado: {mejor['orden']} "
+                  f"(P(ventana) = {mejor['probabilidad']:.1%}, ventana media = {mejor['ventana_media']:.1f}s)\n")
+        else:
+            print(f"💡 Órdenes equivalentes (P(ventana) ≈ {mejor['probabilidad']:.1%}, "
+                  f"ventana media ≈ {mejor['ventana_media']:.1f}s):")
+            for r in paso['recomendados']:
+                print(f"  - {r['orden']}")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simula órdenes de despliegue de productores/consumidores para una secuencia de versiones del esquema")
+    parser.add_argument('versiones', nargs='+',
+                        help="Esquemas en orden (.avsc o <snapshot.db>#<subject>/<version>), al menos dos")
+    parser.add_argument('--productores', type=int, default=PRODUCTORES_POR_DEFECTO,
+                        help="Réplicas del productor")
+    parser.add_argument('--consumidores', nargs='+', default=CONSUMIDORES_POR_DEFECTO,
+                        metavar='NOMBRE=REPLICAS[:ESQUEMA_LECTOR]',
+                        help="Réplicas de cada consumidor y, opcionalmente, su esquema lector desplegado "
+                             "(.avsc, snapshot u Order.java del módulo). Por defecto: consumer1=1 consumer2=1")
+    parser.add_argument('--simulaciones', type=int, default=10000, help="Simulaciones por estrategia de despliegue")
+    parser.add_argument('--duracion', type=float, default=60.0, help="Duración media de la actualización de una réplica (s)")
+    parser.add_argument('--sigma', type=float, default=0.5, help="Dispersión (lognormal) de la duración")
+    parser.add_argument('--jitter', type=float, default=10.0, help="Desfase máximo de arranque en el despliegue simultáneo (s)")
+    parser.add_argument('--lag', type=float, default=5.0, help="Retraso de consumo de los mensajes ya escritos (s)")
+    parser.add_argument('--semilla', type=int, default=None, help="Semilla para reproducir la simulación")
+    args = parser.parse_args()
+
+    if len(args.versiones) < 2:
+        parser.error("se necesitan al menos dos versiones del esquema")
+
+    try:
+        consumidores = {}
+        for arg in args.consumidores:
+            nombre, _, resto = arg.partition('=')
+            replicas, _, archivo = resto.partition(':')
+            consumidores[nombre] = (int(replicas or 1), cargar_esquema_lector(archivo) if archivo else None)
+
+        if args.productores < 1 or sum(replicas for replicas, _ in consumidores.values()) < 1:
+            parser.error("la flota necesita al menos un productor y una réplica de consumidor")
+
+        versiones = [parse(leer_esquema(v)) for v in args.versiones]
+
+        simulacion = simular(versiones, args.productores, consumidores,
+                             simulaciones=args.simulaciones, media=args.duracion, sigma=args.sigma,
+                             jitter=args.jitter, lag=args.lag, semilla=args.semilla)
+        imprimir_simulacion(simulacion, args.versiones)
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
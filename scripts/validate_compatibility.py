@@ -1,30 +1,146 @@
 #!/usr/bin/env python3
+import os
+import re
 import sys
+import json
 import requests
-from avro.schema import parse, RecordSchema
+from concurrent.futures import ProcessPoolExecutor
+from avro.schema import parse
+from registry_snapshot import abrir, leer_esquema, obtener_compatibilidad_snapshot
+
+# Severidades de los resultados producidos por las reglas
+ERROR = 'error'
+ADVERTENCIA = 'advertencia'
+
+# Tipos de esquema Avro que pueden aparecer como nodo ('error' se trata como 'record')
+TIPOS_COMPLEJOS = ('record', 'union', 'enum', 'array', 'map', 'fixed')
+TIPOS_PRIMITIVOS = ('null', 'boolean', 'int', 'long', 'float', 'double', 'bytes', 'string')
+
+# Tabla de despacho: tipo de nodo -> reglas registradas para ese tipo.
+# Todas las reglas se evalúan en un único recorrido de los esquemas (ver evaluar_reglas).
+REGLAS = {tipo: [] for tipo in ('field',) + TIPOS_COMPLEJOS + TIPOS_PRIMITIVOS}
+
+# Lecturas que tiene que permitir cada modo cuando cambia el tipo de un elemento:
+# 'atras' = el esquema nuevo lee datos escritos con el anterior, 'delante' = el anterior lee datos del nuevo
+LECTURAS_POR_MODO = {
+    'BACKWARD': ('atras',),
+    'FORWARD': ('delante',),
+    'FULL': ('atras', 'delante'),
+}
+
+# Por defecto, si no se reconoce compatibilidad, se exigen ambas lecturas
+LECTURAS_POR_MODO_DESCONOCIDO = ('atras', 'delante')
+
+# Cambios en campos obligatorios que no admite cada modo, con la sugerencia asociada
+CAMBIOS_OBLIGATORIOS_PROHIBIDOS = {
+    'BACKWARD': {
+        'añadido': "Para permitir añadir campos obligatorios, configure la compatibilidad como FORWARD",
+    },
+    'FORWARD': {
+        'eliminado': "Para permitir eliminar campos obligatorios, configure la compatibilidad como BACKWARD",
+    },
+    'FULL': {
+        'añadido': "Compatibilidad FULL solo permite añadir/eliminar campos opcionales",
+        'eliminado': "Compatibilidad FULL solo permite añadir/eliminar campos opcionales",
+    },
+}
+
+# Por defecto, si no se reconoce compatibilidad, no permitir cambios en campos obligatorios
+CAMBIOS_OBLIGATORIOS_PROHIBIDOS_DESCONOCIDA = {'añadido': None, 'eliminado': None}
+
+def regla(*tipos_nodo):
+    """
+    Decorador que registra una regla para uno o varios tipos de nodo.
+    La regla recibe (nodo, compatibilidad) y devuelve (o produce) resultados.
+    """
+    def registrar(funcion):
+        for tipo in tipos_nodo:
+            REGLAS[tipo].append(funcion)
+        return funcion
+    return registrar
 
-def validar_metadatos(cambios_metadatos, compatibilidad):
-    errores = []
-    advertencias = []
+def resultado(severidad, ruta, mensaje, sugerencia=None):
+    return {
+        'severidad': severidad,
+        'ruta': ruta,
+        'mensaje': mensaje,
+        'sugerencia': sugerencia
+    }
+
+@regla(*TIPOS_COMPLEJOS, *TIPOS_PRIMITIVOS)
+def regla_cambio_tipo(nodo, compatibilidad):
+    tipo_ant = tipo_nodo(nodo['anterior'])
+    tipo_nue = tipo_nodo(nodo['nuevo'])
+    if tipo_ant == tipo_nue:
+        return
+
+    mensaje = f"Cambio de 'type' ({tipo_ant} -> {tipo_nue})"
+    if compatibilidad == 'NONE':
+        yield resultado(ADVERTENCIA, nodo['ruta'], mensaje)
+        return
+
+    # Se aplican las reglas de resolución de Avro (promociones, uniones...), igual que en el análisis por consumidor
+    fallos = []
+    lecturas = LECTURAS_POR_MODO.get(compatibilidad, LECTURAS_POR_MODO_DESCONOCIDO)
+    if 'atras' in lecturas and not analizar_lector(nodo['anterior'], nodo['nuevo'])['compatible']:
+        fallos.append("el esquema nuevo no puede leer datos escritos con el anterior")
+    if 'delante' in lecturas and not analizar_lector(nodo['nuevo'], nodo['anterior'])['compatible']:
+        fallos.append("el esquema anterior no puede leer datos escritos con el nuevo")
+
+    if fallos:
+        yield resultado(ERROR, nodo['ruta'], f"{mensaje} no permitido con compatibilidad {compatibilidad}: {'; '.join(fallos)}")
+
+@regla('record')
+def regla_metadatos(nodo, compatibilidad):
+    anterior = nodo['anterior']
+    nuevo = nodo['nuevo']
+
+    # Los cambios de tipo los cubre regla_cambio_tipo
+    if tipo_nodo(anterior) != 'record':
+        return
 
     # Reglas para 'name'
-    if 'name' in cambios_metadatos:
+    if anterior.name != nuevo.name:
         if compatibilidad != 'NONE':
-            errores.append("Cambio de 'name' requiere compatibilidad=NONE")
+            yield resultado(ERROR, nodo['ruta'], "Cambio de 'name' requiere compatibilidad=NONE",
+                            "Usar aliases para mantener la compatibilidad")
         else:
-            advertencias.append("Cambio de 'name' detectado (usar aliases para compatibilidad)")
-
-    # Reglas para 'type'
-    if 'type' in cambios_metadatos:
-        errores.append("Cambio de 'type' es incompatible con cualquier modo de compatibilidad")
+            yield resultado(ADVERTENCIA, nodo['ruta'], "Cambio de 'name' detectado (usar aliases para compatibilidad)")
 
     # Reglas para 'namespace'
-    if 'namespace' in cambios_metadatos:
-        advertencias.append("Cambio de 'namespace' puede afectar serialización (usar aliases)")
+    if anterior.namespace != nuevo.namespace:
+        yield resultado(ADVERTENCIA, nodo['ruta'], "Cambio de 'namespace' puede afectar serialización (usar aliases)")
+
+@regla('field')
+def regla_campos_obligatorios(nodo, compatibilidad):
+    if nodo['anterior'] is None:
+        cambio, campo = 'añadido', nodo['nuevo']
+    elif nodo['nuevo'] is None:
+        cambio, campo = 'eliminado', nodo['anterior']
+    else:
+        return
 
-    return errores, advertencias
+    # Añadir/eliminar campos opcionales está permitido en todos los modos
+    if campo.has_default:
+        return
+
+    prohibidos = CAMBIOS_OBLIGATORIOS_PROHIBIDOS.get(compatibilidad, CAMBIOS_OBLIGATORIOS_PROHIBIDOS_DESCONOCIDA)
+    if cambio in prohibidos:
+        yield resultado(ERROR, nodo['ruta'],
+                        f"Campo obligatorio {cambio} no permitido con compatibilidad {compatibilidad}",
+                        prohibidos[cambio])
 
 def obtener_compatibilidad(url_registry, subject):
+    # Con SCHEMA_REGISTRY_SNAPSHOT se consulta el snapshot local en lugar del registry.
+    # Si el snapshot no existe o no se puede leer es un error: no se recurre a BACKWARD por defecto.
+    snapshot = os.environ.get('SCHEMA_REGISTRY_SNAPSHOT')
+    if snapshot:
+        conn = abrir(snapshot)
+        try:
+            return obtener_compatibilidad_snapshot(conn, subject)
+        finally:
+            conn.close()
+
     try:
         response = requests.get(f"{url_registry}/config/{subject}")
         if response.status_code == 200:
@@ -37,114 +153,307 @@ def obtener_compatibilidad(url_registry, subject):
         print(f"⚠️ Error obteniendo compatibilidad: {e}")
         return 'BACKWARD'
 
-def analizar_campos_recursivo(campos_ant, campos_nue, path=""):
+def tipo_nodo(esquema):
+    # Los 'error' de Avro son records a efectos de validación
+    return 'record' if esquema.type == 'error' else esquema.type
+
+def clave_rama(esquema):
+    # Las ramas de una unión se emparejan por nombre completo (tipos con nombre) o por tipo
+    return getattr(esquema, 'fullname', None) or esquema.type
+
+def recorrer(anterior, nuevo, ruta="", en_curso=None):
     """
-    Analiza campos y subcampos recursivamente y clasifica añadidos/eliminados obligatorios y opcionales.
-    path es el prefijo para los nombres de campo anidados, ejemplo: "user.address."
+    Recorre en paralelo el esquema anterior y el nuevo y produce un nodo por cada elemento comparable.
+    ruta es el nombre completo del elemento, ejemplo: "user.address.street" o "items[].price"
     """
-    añadidos_obligatorios = []
-    añadidos_opcionales = []
-    eliminados_obligatorios = []
-    eliminados_opcionales = []
-
-    nombres_ant = set(campos_ant.keys())
-    nombres_nue = set(campos_nue.keys())
-
-    # Campos añadidos
-    for nombre in nombres_nue - nombres_ant:
-        campo = campos_nue[nombre]
-        nombre_completo = f"{path}{nombre}"
-        if campo.has_default:
-            añadidos_opcionales.append(nombre_completo)
-        else:
-            añadidos_obligatorios.append(nombre_completo)
+    if en_curso is None:
+        en_curso = set()
 
-    # Campos eliminados
-    for nombre in nombres_ant - nombres_nue:
-        campo = campos_ant[nombre]
-        nombre_completo = f"{path}{nombre}"
-        if campo.has_default:
-            eliminados_opcionales.append(nombre_completo)
-        else:
-            eliminados_obligatorios.append(nombre_completo)
-
-    # Campos comunes: profundizar si son records (subcampos)
-    for nombre in nombres_ant & nombres_nue:
-        campo_ant = campos_ant[nombre]
-        campo_nue = campos_nue[nombre]
-
-        # Si son records, analizar sus campos recursivamente
-        if isinstance(campo_ant.type, RecordSchema) and isinstance(campo_nue.type, RecordSchema):
-            res = analizar_campos_recursivo(
-                {c.name: c for c in campo_ant.type.fields},
-                {c.name: c for c in campo_nue.type.fields},
-                path=f"{path}{nombre}."
-            )
-            añadidos_obligatorios.extend(res['añadidos_obligatorios'])
-            añadidos_opcionales.extend(res['añadidos_opcionales'])
-            eliminados_obligatorios.extend(res['eliminados_obligatorios'])
-            eliminados_opcionales.extend(res['eliminados_opcionales'])
-
-        # Podríamos agregar más validaciones para otros tipos complejos (arrays, maps, unions) si fuera necesario
+    tipo = tipo_nodo(nuevo)
+    tipo_ant = tipo_nodo(anterior)
 
-    return {
-        'añadidos_obligatorios': añadidos_obligatorios,
-        'añadidos_opcionales': añadidos_opcionales,
-        'eliminados_obligatorios': eliminados_obligatorios,
-        'eliminados_opcionales': eliminados_opcionales
-    }
+    # Todos los tipos Avro tienen entrada en REGLAS, así que cada par de esquemas produce un nodo
+    if tipo in REGLAS:
+        yield {'tipo': tipo, 'ruta': ruta, 'anterior': anterior, 'nuevo': nuevo}
 
-def validar_reglas_campos(cambios_campos, compatibilidad):
-    errores = []
-    sugerencias = []
+    # Solo se profundiza si ambos lados tienen el mismo tipo
+    if tipo_ant != tipo:
+        return
+
+    if tipo == 'record':
+        # Evitar ciclos en esquemas recursivos: solo se corta si el record ya está en la pila de recursión,
+        # así un tipo con nombre referenciado desde varios campos se analiza en todas sus rutas
+        clave = (anterior.fullname, nuevo.fullname)
+        if clave in en_curso:
+            return
+        en_curso.add(clave)
+
+        campos_ant = anterior.fields_dict
+        campos_nue = nuevo.fields_dict
+        nombres = list(campos_nue) + [n for n in campos_ant if n not in campos_nue]
 
-    if compatibilidad == 'BACKWARD':
-        # No se permiten añadir campos obligatorios
-        if cambios_campos['añadidos_obligatorios']:
-            errores.append(f"Añadidos campos obligatorios no permitidos: {cambios_campos['añadidos_obligatorios']}")
-            sugerencias.append("Para permitir añadir campos obligatorios, configure la compatibilidad como FORWARD")
+        for nombre in nombres:
+            campo_ant = campos_ant.get(nombre)
+            campo_nue = campos_nue.get(nombre)
+            ruta_campo = f"{ruta}.{nombre}" if ruta else nombre
 
-        # Eliminar campos obligatorios sí está permitido
-        # Añadir/eliminar campos opcionales está permitido
+            yield {'tipo': 'field', 'ruta': ruta_campo, 'anterior': campo_ant, 'nuevo': campo_nue}
 
-    elif compatibilidad == 'FORWARD':
-        # No se permiten eliminar campos obligatorios
-        if cambios_campos['eliminados_obligatorios']:
-            errores.append(f"Eliminados campos obligatorios no permitidos: {cambios_campos['eliminados_obligatorios']}")
-            sugerencias.append("Para permitir eliminar campos obligatorios, configure la compatibilidad como BACKWARD")
+            # Campos comunes: profundizar en su tipo
+            if campo_ant is not None and campo_nue is not None:
+                yield from recorrer(campo_ant.type, campo_nue.type, ruta_campo, en_curso)
 
-        # Añadir campos obligatorios sí está permitido
-        # Añadir/eliminar campos opcionales está permitido
+        en_curso.discard(clave)
 
-    elif compatibilidad == 'FULL':
-        # No se permiten añadir ni eliminar campos obligatorios
-        if cambios_campos['añadidos_obligatorios']:
-            errores.append(f"Añadidos campos obligatorios no permitidos: {cambios_campos['añadidos_obligatorios']}")
-            sugerencias.append("Compatibilidad FULL solo permite añadir/eliminar campos opcionales")
+    elif tipo == 'array':
+        yield from recorrer(anterior.items, nuevo.items, f"{ruta}[]", en_curso)
 
-        if cambios_campos['eliminados_obligatorios']:
-            errores.append(f"Eliminados campos obligatorios no permitidos: {cambios_campos['eliminados_obligatorios']}")
-            sugerencias.append("Compatibilidad FULL solo permite añadir/eliminar campos opcionales")
+    elif tipo == 'map':
+        yield from recorrer(anterior.values, nuevo.values, f"{ruta}{{}}", en_curso)
 
-        # Añadir/eliminar campos opcionales está permitido
+    elif tipo == 'union':
+        ramas_ant = {clave_rama(r): r for r in anterior.schemas}
+        for rama in nuevo.schemas:
+            rama_ant = ramas_ant.get(clave_rama(rama))
+            if rama_ant is not None:
+                yield from recorrer(rama_ant, rama, ruta, en_curso)
 
+def evaluar_reglas(esquema_ant, esquema_nuevo, compatibilidad):
+    """
+    Evalúa todas las reglas registradas en un único recorrido de ambos esquemas.
+    Cada nodo se despacha a las reglas de su tipo a través de la tabla REGLAS.
+    """
+    resultados = []
+    for nodo in recorrer(esquema_ant, esquema_nuevo):
+        for aplicar in REGLAS[nodo['tipo']]:
+            resultados.extend(aplicar(nodo, compatibilidad) or ())
+    return resultados
+
+def formatear_resultado(res):
+    return f"{res['ruta']}: {res['mensaje']}" if res['ruta'] else res['mensaje']
+
+# Códigos de salida del modo --consumidores: distinguen un consumidor que no puede leer el esquema
+# de un fallo del propio análisis (esquema ilegible, SCHEMA$ ausente...)
+SALIDA_CONSUMIDOR_INCOMPATIBLE = 1
+SALIDA_ERROR_CRITICO = 2
+
+# Promociones de tipos primitivos que admite la resolución de esquemas Avro (escritor -> lector)
+PROMOCIONES = {
+    'int': {'long', 'float', 'double'},
+    'long': {'float', 'double'},
+    'float': {'double'},
+    'string': {'bytes'},
+    'bytes': {'string'},
+}
+
+def cargar_esquema_lector(archivo):
+    """
+    Carga el esquema lector de un consumidor desde un .avsc, desde el snapshot o desde la clase generada por Avro
+    (Order.java), que contiene el esquema con el que se compiló el módulo en SCHEMA$.
+    """
+    if not archivo.endswith('.java'):
+        return parse(leer_esquema(archivo))
+
+    contenido = open(archivo).read()
+
+    declaracion = re.search(r'SCHEMA\$\s*=\s*new org\.apache\.avro\.Schema\.Parser\(\)\.parse\((.*?)\);', contenido, re.S)
+    if not declaracion:
+        raise ValueError(f"No se encontró SCHEMA$ en '{archivo}'")
+
+    # Avro divide los esquemas largos en varios literales: se concatenan y se decodifican los escapes
+    literales = re.findall(r'"((?:[^"\\]|\\.)*)"', declaracion.group(1))
+    return parse(''.join(json.loads(f'"{literal}"') for literal in literales))
+
+def nombres_aceptados(lector):
+    # El lector acepta su propio nombre y sus aliases (sin namespace, como el cliente Java)
+    aliases = lector.props.get('aliases') or []
+    return {lector.name} | {alias.split('.')[-1] for alias in aliases}
+
+def resolver(escritor, lector, ruta, impacto, en_curso):
+    """
+    Resuelve el esquema escritor contra el esquema lector siguiendo las reglas de Avro y anota en impacto
+    los campos que el lector pierde, los defaults que rellena y los errores que harían fallar la lectura.
+    Devuelve False si el escritor no puede leerse con el lector.
+    """
+    ruta_legible = ruta or '<raíz>'
+
+    # Unión en el escritor: cada rama escrita tiene que poder resolverse contra el lector
+    if escritor.type == 'union':
+        resultados = [resolver(rama, lector, ruta, impacto, en_curso) for rama in escritor.schemas]
+        return all(resultados)
+
+    # Unión solo en el lector: se usa la primera rama compatible
+    if lector.type == 'union':
+        for rama in lector.schemas:
+            if ramas_compatibles(escritor, rama):
+                return resolver(escritor, rama, ruta, impacto, en_curso)
+        impacto['errores'].append(f"{ruta_legible}: el tipo '{escritor.type}' no existe en la unión del lector")
+        return False
+
+    tipo_esc = tipo_nodo(escritor)
+    tipo_lec = tipo_nodo(lector)
+
+    if tipo_esc != tipo_lec:
+        if tipo_lec in PROMOCIONES.get(tipo_esc, ()):
+            return True
+        impacto['errores'].append(f"{ruta_legible}: tipo '{tipo_esc}' no se puede leer como '{tipo_lec}'")
+        return False
+
+    if tipo_esc in ('record', 'enum', 'fixed') and escritor.name not in nombres_aceptados(lector):
+        impacto['errores'].append(f"{ruta_legible}: nombre '{escritor.name}' no coincide con '{lector.name}' ni con sus aliases")
+        return False
+
+    if tipo_esc == 'record':
+        # Evitar ciclos en esquemas recursivos (solo records en la pila de recursión, para no perder
+        # las rutas de un tipo con nombre referenciado desde varios campos)
+        clave = (escritor.fullname, lector.fullname)
+        if clave in en_curso:
+            return True
+        en_curso.add(clave)
+
+        compatible = True
+        campos_esc = escritor.fields_dict
+        emparejados = set()
+
+        for campo_lec in lector.fields:
+            ruta_campo = f"{ruta}.{campo_lec.name}" if ruta else campo_lec.name
+            candidatos = [campo_lec.name] + list(campo_lec.props.get('aliases') or [])
+            nombre_esc = next((n for n in candidatos if n in campos_esc), None)
+
+            if nombre_esc is not None:
+                emparejados.add(nombre_esc)
+                compatible &= resolver(campos_esc[nombre_esc].type, campo_lec.type, ruta_campo, impacto, en_curso)
+            elif campo_lec.has_default:
+                impacto['defaults'].append(f"{ruta_campo} (default: {json.dumps(campo_lec.default)})")
+            else:
+                impacto['errores'].append(f"{ruta_campo}: campo obligatorio del lector que el productor no escribe")
+                compatible = False
+
+        # Campos escritos que el lector no conoce: se descartan al deserializar
+        for nombre in campos_esc:
+            if nombre not in emparejados:
+                impacto['perdidos'].append(f"{ruta}.{nombre}" if ruta else nombre)
+
+        en_curso.discard(clave)
+        return compatible
+
+    if tipo_esc == 'enum':
+        desconocidos = [s for s in escritor.symbols if s not in lector.symbols]
+        if desconocidos and lector.props.get('default') is None:
+            impacto['errores'].append(f"{ruta_legible}: símbolos {desconocidos} no existen en el enum del lector")
+            return False
+        return True
+
+    if tipo_esc == 'fixed' and escritor.size != lector.size:
+        impacto['errores'].append(f"{ruta_legible}: tamaño fixed {escritor.size} distinto de {lector.size}")
+        return False
+
+    if tipo_esc == 'array':
+        return resolver(escritor.items, lector.items, f"{ruta}[]", impacto, en_curso)
+
+    if tipo_esc == 'map':
+        return resolver(escritor.values, lector.values, f"{ruta}{{}}", impacto, en_curso)
+
+    return True
+
+def ramas_compatibles(escritor, rama_lector):
+    # Comprobación superficial para elegir la rama de la unión del lector (sin recorrer subcampos)
+    tipo_esc = tipo_nodo(escritor)
+    tipo_lec = tipo_nodo(rama_lector)
+    if tipo_esc in ('record', 'enum', 'fixed'):
+        return tipo_esc == tipo_lec and escritor.name in nombres_aceptados(rama_lector)
+    return tipo_esc == tipo_lec or tipo_lec in PROMOCIONES.get(tipo_esc, ())
+
+def analizar_lector(escritor, lector):
+    impacto = {'perdidos': [], 'defaults': [], 'errores': []}
+    impacto['compatible'] = resolver(escritor, lector, "", impacto, set())
+    return impacto
+
+def analizar_lector_json(escritor_json, lector_json):
+    # Punto de entrada de los procesos del pool: los esquemas viajan como JSON
+    return analizar_lector(parse(escritor_json), parse(lector_json))
+
+def analizar_consumidores(escritor, lectores):
+    """
+    Resuelve el esquema escritor contra el esquema lector de cada consumidor ({nombre: esquema}).
+    Los consumidores con el mismo esquema lector completo (incluidos defaults y aliases, que afectan
+    a la resolución) se resuelven una sola vez. La resolución es CPU en Python puro, así que las
+    resoluciones distintas se reparten entre procesos para no quedar serializadas por el GIL.
+    """
+    claves = {nombre: json.dumps(lector.to_json(), sort_keys=True) for nombre, lector in lectores.items()}
+    distintos = dict.fromkeys(claves.values())
+
+    if len(distintos) == 1:
+        impactos = {clave: analizar_lector(escritor, parse(clave)) for clave in distintos}
     else:
-        # Por defecto, si no se reconoce compatibilidad, no permitir cambios en campos obligatorios
-        if cambios_campos['añadidos_obligatorios'] or cambios_campos['eliminados_obligatorios']:
-            errores.append("Cambios en campos obligatorios no permitidos con compatibilidad desconocida")
+        escritor_json = json.dumps(escritor.to_json())
+        with ProcessPoolExecutor() as executor:
+            futuros = {clave: executor.submit(analizar_lector_json, escritor_json, clave) for clave in distintos}
+        impactos = {clave: futuro.result() for clave, futuro in futuros.items()}
+
+    # Se conserva el orden en que se pasaron los consumidores
+    return {nombre: impactos[claves[nombre]] for nombre in lectores}
+
+def imprimir_impacto(impactos):
+    for nombre, impacto in impactos.items():
+        estado = "✅ puede leer" if impacto['compatible'] else "❌ NO puede leer"
+        print(f"\n📦 {nombre}: {estado} lo que escribirá el productor")
 
-    return errores, sugerencias
+        if impacto['perdidos']:
+            print(f"  🔴 Campos que pierde ({len(impacto['perdidos'])}):")
+            for campo in impacto['perdidos']:
+                print(f"    - {campo}")
+
+        if impacto['defaults']:
+            print(f"  🟡 Campos que rellena con default ({len(impacto['defaults'])}):")
+            for campo in impacto['defaults']:
+                print(f"    * {campo}")
+
+        if impacto['errores']:
+            print(f"  ❌ Errores de lectura ({len(impacto['errores'])}):")
+            for error in impacto['errores']:
+                print(f"    - {error}")
 
 
 if __name__ == "__main__":
+    # Modo de impacto por consumidor: ¿puede cada consumidor leer lo que escribirá el productor?
+    if len(sys.argv) > 1 and sys.argv[1] == '--consumidores':
+        if len(sys.argv) < 4 or not all('=' in arg for arg in sys.argv[3:]):
+            print("Uso: python validate_compatibility.py --consumidores <esquema_nuevo> <consumidor>=<esquema_lector> ...")
+            sys.exit(SALIDA_ERROR_CRITICO)
+
+        try:
+            escritor = parse(leer_esquema(sys.argv[2]))
+            lectores = {}
+            for arg in sys.argv[3:]:
+                nombre, archivo = arg.split('=', 1)
+                lectores[nombre] = cargar_esquema_lector(archivo)
+
+            print(f"🔍 Analizando impacto del nuevo esquema en {len(lectores)} consumidores...")
+            impactos = analizar_consumidores(escritor, lectores)
+            imprimir_impacto(impactos)
+
+            fallidos = [nombre for nombre, impacto in impactos.items() if not impacto['compatible']]
+            if fallidos:
+                print(f"\n❌ Consumidores que fallarán: {', '.join(fallidos)}")
+                sys.exit(SALIDA_CONSUMIDOR_INCOMPATIBLE)
+
+            print("\n✅ Todos los consumidores pueden leer el nuevo esquema")
+            sys.exit(0)
+
+        except Exception as e:
+            print(f"❌ Error crítico: {e}")
+            sys.exit(SALIDA_ERROR_CRITICO)
+
     if len(sys.argv) != 3:
         print("Uso: python validate_compatibility.py <esquema_ant> <esquema_nuevo>")
+        print("     python validate_compatibility.py --consumidores <esquema_nuevo> <consumidor>=<esquema_lector> ...")
         sys.exit(1)
 
     try:
         # Cargar esquemas
-        esquema_ant = parse(open(sys.argv[1]).read())
-        esquema_nuevo = parse(open(sys.argv[2]).read())
+        esquema_ant = parse(leer_esquema(sys.argv[1]))
+        esquema_nuevo = parse(leer_esquema(sys.argv[2]))
 
         # Configuración
         registry_url = "http://schema-registry:8081"
@@ -154,32 +463,18 @@ if __name__ == "__main__":
         compatibilidad = obtener_compatibilidad(registry_url, subject)
         print(f"🔍 Modo de compatibilidad actual: {compatibilidad}")
 
-        # Validar metadatos
-        cambios_metadatos = {
-            'type': (esquema_ant.type, esquema_nuevo.type),
-            'name': (esquema_ant.name, esquema_nuevo.name),
-            'namespace': (esquema_ant.namespace, esquema_nuevo.namespace),
-            'doc': (getattr(esquema_ant, 'doc', None), getattr(esquema_nuevo, 'doc', None))
-        }
-        cambios_metadatos = {k: v for k, v in cambios_metadatos.items() if v[0] != v[1]}
-
-        errores, advertencias = validar_metadatos(cambios_metadatos, compatibilidad)
-
-        # Validar campos y subcampos
-        cambios_campos = analizar_campos_recursivo(
-            {c.name: c for c in esquema_ant.fields},
-            {c.name: c for c in esquema_nuevo.fields},
-            path=""
-        )
-        errores_campos, sugerencias = validar_reglas_campos(cambios_campos, compatibilidad)
+        # Validar metadatos, campos y subcampos en un solo recorrido
+        resultados = evaluar_reglas(esquema_ant, esquema_nuevo, compatibilidad)
 
-        errores += errores_campos
+        errores = [r for r in resultados if r['severidad'] == ERROR]
+        advertencias = [r for r in resultados if r['severidad'] == ADVERTENCIA]
+        sugerencias = list(dict.fromkeys(r['sugerencia'] for r in errores if r['sugerencia']))
 
         # Resultados
         if errores:
             print("❌ Errores de compatibilidad:")
             for e in errores:
-                print(f"  - {e}")
+                print(f"  - {formatear_resultado(e)}")
             if sugerencias:
                 print("\n💡 Sugerencias:")
                 for s in sugerencias:
@@ -189,7 +484,7 @@ if __name__ == "__main__":
         if advertencias:
             print("⚠️ Advertencias:")
             for a in advertencias:
-                print(f"  - {a}")
+                print(f"  - {formatear_resultado(a)}")
 
         print("✅ Validación completada exitosamente")
         sys.exit(0)